@@ -2,6 +2,7 @@ import dash
 import dash_core_components as dcc
 import dash_bootstrap_components as dbc
 import dash_html_components as html
+import dash_table
 from dash.dependencies import Input, Output
 
 import pandas as pd
@@ -21,7 +22,8 @@ server = app.server
 # allow exceptions from adding callbacks to elements that don't exist yet on layout
 app.config.suppress_callback_exceptions = True
 #
-confirmed_data, epicurves, rcurves, countries_list, data_dates = covid.get_covid_data()
+confirmed_data, epicurves, rcurves, countries_list, data_dates, series_data = covid.get_covid_data()
+ranking_index = covid.build_ranking_index(confirmed_data, epicurves, rcurves, countries_list)
 
 
 website_navbar = dbc.Navbar(
@@ -63,6 +65,28 @@ choropleth_map = dbc.Card(dbc.CardBody(
                 )
 
 
+ranking_table = dbc.Card(dbc.CardBody(
+                    [
+                    html.H1('Ranking countries'),
+                    dbc.Row([
+                        dbc.Col(dcc.Dropdown(id="ranking-metric", value='Latest R',
+                                             options=[{'label': "Latest Reproduction Number ", 'value': 'Latest R'},
+                                                      {'label': "Average Reproduction Number (last 7 days) ", 'value': 'Trailing R'},
+                                                      {'label': "New Cases (on last reported day) ", 'value': 'New Cases'},
+                                                      {'label': "Doubling Time of Total Cases (days) ", 'value': 'Doubling Time'}],
+                                             clearable=False)),
+                        dbc.Col(dcc.Input(id="ranking-count", type="number", value=10, min=1, step=1)),
+                    ], className="mb-3"),
+                    dash_table.DataTable(id="ranking-table",
+                                         columns=[{'name': "Rank", 'id': 'Rank'},
+                                                  {'name': "Country", 'id': 'Country'},
+                                                  {'name': "Value", 'id': 'Value'}],
+                                         style_cell={'textAlign': 'left'}),
+                    ]
+                    ), className="mt-3",
+                    )
+
+
 def get_epicurve_graphs(countries, epicurves, countries_list, data_dates):
     epicurve_graphs = []
 
@@ -164,6 +188,8 @@ national_tab_content = dbc.Card(
         [
             choropleth_map,
             html.Hr(),
+            ranking_table,
+            html.Hr(),
             graphs_and_control,
         ]
     ),
@@ -308,6 +334,17 @@ def update_figure(selected):
                                                                       'projection': {'type': "miller"}})}
 
 
+@app.callback(Output("ranking-table", "data"),
+             [Input("ranking-metric", "value"),
+             Input("ranking-count", "value")],)
+def update_ranking_table(metric, n):
+    n = 10 if n is None else max(1, int(n))
+    top_countries = covid.get_top_countries(ranking_index, metric, n)
+
+    return [{'Rank': rank+1, 'Country': country, 'Value': np.around(value, decimals=2)}
+            for rank, (country, value) in enumerate(top_countries)]
+
+
 @app.callback(Output("graph-content", "children"),
              [Input('country-name', 'value')],)
 def render_graph_content(countries):
@@ -390,7 +427,13 @@ def update_r_evaluation(ref_date, countries):
 @app.callback(Output('placeholder', 'children'),
              [Input('data-auto-update', 'n_intervals')],)
 def update_data(n):
-    confirmed_data, epicurves, rcurves, countries_list, data_dates = covid.get_covid_data()
+    global confirmed_data, epicurves, rcurves, countries_list, data_dates, series_data, ranking_index
+    new_data = covid.get_covid_data()
+    new_ranking_index = covid.build_ranking_index(*new_data[:4])
+
+    # swap everything at once so callbacks never mix data versions
+    confirmed_data, epicurves, rcurves, countries_list, data_dates, series_data, ranking_index = \
+        new_data + (new_ranking_index,)
 
 
 @app.callback(Output('page-content', 'children'),
@@ -1,25 +1,82 @@
+import logging
+
 import pandas as pd
 import numpy as np
 
+from concurrent.futures import ThreadPoolExecutor
 from scipy.stats import gamma
 
 
-def get_covid_data():
-    confirmed_data = pd.read_csv(
-        "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/csse_covid_19_data/csse_covid_19_time_series/time_series_covid19_confirmed_global.csv")
+logger = logging.getLogger(__name__)
+
+JHU_SERIES_URL = "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/csse_covid_19_data/csse_covid_19_time_series/time_series_covid19_{}_global.csv"
+
+SERIES_NAMES = ['confirmed', 'deaths', 'recovered']
+
 
-    confirmed_data = (confirmed_data.groupby(
+def read_covid_series(series):
+    series_data = pd.read_csv(JHU_SERIES_URL.format(series))
+
+    series_data = (series_data.groupby(
         "Country/Region").sum()).drop(columns=['Lat', 'Long'])
-    confirmed_data = confirmed_data.drop(['Diamond Princess','MS Zaandam'])
+    series_data = series_data.drop(['Diamond Princess','MS Zaandam'])
+
+    return series_data
+
+
+def get_covid_series():
+    # download and parse the series concurrently; the work is mostly network I/O
+    with ThreadPoolExecutor(max_workers=len(SERIES_NAMES)) as executor:
+        futures = [executor.submit(read_covid_series, series) for series in SERIES_NAMES]
+
+    # the dashboard needs the confirmed series, the others are optional
+    confirmed = futures[0].result()
+    data_dates = pd.to_datetime(confirmed.columns, format='%m/%d/%y')
+    countries_list = list(confirmed.index)
 
-    data_dates = pd.to_datetime(confirmed_data.columns, format='%m/%d/%y')
-    countries_list = list(confirmed_data.index)
+    # align every series to the countries and dates of the confirmed series
+    all_series = [confirmed]
+    for series, future in zip(SERIES_NAMES[1:], futures[1:]):
+        try:
+            series_frame = future.result()
+        except Exception:
+            logger.exception("Could not read %s series, leaving it empty", series)
+            all_series.append(pd.DataFrame(np.nan, index=confirmed.index,
+                                           columns=confirmed.columns))
+            continue
 
-    confirmed_data = np.array(confirmed_data)
-    epicurves = get_epicurves(confirmed_data)
+        missing_countries = confirmed.index.difference(series_frame.index)
+        missing_dates = confirmed.columns.difference(series_frame.columns)
+        if len(missing_countries) > 0 or len(missing_dates) > 0:
+            logger.warning("%s series is missing countries %s and dates %s, "
+                           "carried forward from the previous date or 0 if never reported",
+                           series, list(missing_countries), list(missing_dates))
+
+        # cumulative counts carry forward over missing dates instead of dropping to 0
+        series_frame = series_frame.reindex(index=confirmed.index, columns=confirmed.columns)
+        all_series.append(series_frame.ffill(axis=1).fillna(0))
+
+    # axis 0 follows SERIES_NAMES
+    series_data = np.stack([np.array(series_frame, dtype=np.float64)
+                            for series_frame in all_series])
+
+    return series_data, countries_list, data_dates
+
+
+def get_series_curves(series_data, series, countries_list, data_dates):
+    cumulative_data = series_data[SERIES_NAMES.index(series)]
+    epicurves = get_epicurves(cumulative_data)
     rcurves = compute_dynamic_r(epicurves, data_dates, countries_list, 3)
 
-    return confirmed_data, epicurves, rcurves, countries_list, data_dates
+    return cumulative_data, epicurves, rcurves
+
+
+def get_covid_data():
+    series_data, countries_list, data_dates = get_covid_series()
+    confirmed_data, epicurves, rcurves = get_series_curves(series_data, 'confirmed',
+                                                           countries_list, data_dates)
+
+    return confirmed_data, epicurves, rcurves, countries_list, data_dates, series_data
 
 
 def get_epicurves(confirmed_data):
@@ -89,6 +146,97 @@ def compute_dynamic_r(epicurves, epi_dates, countries_list, win_size):
 
     return dynamic_r
 
+
+def get_doubling_times(confirmed_data, win_size):
+    # days for the cumulative count to double, from growth over the last window
+    current = confirmed_data[:, -1].astype(np.float64)
+    previous = confirmed_data[:, -(win_size+1)].astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.log(current/previous)
+        doubling_times = win_size*np.log(2)/growth
+        doubling_times[~(growth > 0)] = np.nan # cases are not growing
+    doubling_times[(previous <= 0) | (current <= 0)] = np.nan # no cases to double
+    return doubling_times
+
+
+def build_ranking_index(confirmed_data, epicurves, rcurves, countries_list, win_size=7):
+    n_countries = len(countries_list)
+
+    # windows without new cases are skipped, so an R curve can end early
+    last_window_date = max((rcurves[country]['dates'][-1] for country in countries_list
+                            if len(rcurves[country]['dates']) > 0), default=None)
+
+    latest_r = np.full(n_countries, np.nan)
+    trailing_r = np.full(n_countries, np.nan)
+    for idx in range(n_countries):
+        dates = rcurves[countries_list[idx]]['dates']
+        mean_r = np.array(rcurves[countries_list[idx]]['mean_r'])
+        if last_window_date is None or len(mean_r) == 0:
+            continue # no R window for this country, or for any country
+        if dates[-1] == last_window_date:
+            latest_r[idx] = mean_r[-1]
+        trailing = np.asarray(dates > last_window_date - pd.Timedelta(days=win_size))
+        if np.any(trailing):
+            trailing_r[idx] = np.mean(mean_r[trailing])
+
+    # values and whether the smallest value ranks first
+    metrics = {'Latest R': (latest_r, False),
+               'Trailing R': (trailing_r, False),
+               'New Cases': (epicurves[:, -1].astype(np.float64), False),
+               'Doubling Time': (get_doubling_times(confirmed_data, win_size), True)}
+
+    # sort once per dataset version in rank order; countries without a value
+    # are left out and tied countries keep their country order
+    ranked_metrics = dict() # keys are ranking metrics
+    for metric, (values, ascending) in metrics.items():
+        valid = np.flatnonzero(~np.isnan(values))
+        sort_keys = values[valid] if ascending else -values[valid]
+        order = np.argsort(sort_keys, kind='stable')
+        ranked_metrics[metric] = {'values': values,
+                                  'order': valid[order],
+                                  'sorted_keys': sort_keys[order],
+                                  'ascending': ascending}
+
+    return {'countries': list(countries_list), 'metrics': ranked_metrics}
+
+
+def get_ranked_metric(ranking_index, metric):
+    if metric not in ranking_index['metrics']:
+        raise ValueError("Unknown ranking metric '{}', expected one of: {}".format(
+            metric, ", ".join(ranking_index['metrics'].keys())))
+    return ranking_index['metrics'][metric]
+
+
+def get_ranked_countries(ranking_index, ranked, order):
+    return [(ranking_index['countries'][idx], ranked['values'][idx])
+            for idx in order]
+
+
+def get_top_countries(ranking_index, metric, n):
+    ranked = get_ranked_metric(ranking_index, metric)
+    return get_ranked_countries(ranking_index, ranked, ranked['order'][:n])
+
+
+def get_countries_by_threshold(ranking_index, metric, threshold, above=True):
+    ranked = get_ranked_metric(ranking_index, metric)
+    # sort keys are negated values for metrics ranked largest first
+    if ranked['ascending']:
+        if above:
+            start = np.searchsorted(ranked['sorted_keys'], threshold, side='right')
+            order = ranked['order'][start:]
+        else:
+            end = np.searchsorted(ranked['sorted_keys'], threshold, side='left')
+            order = ranked['order'][:end]
+    else:
+        if above:
+            end = np.searchsorted(ranked['sorted_keys'], -threshold, side='left')
+            order = ranked['order'][:end]
+        else:
+            start = np.searchsorted(ranked['sorted_keys'], -threshold, side='right')
+            order = ranked['order'][start:]
+    return get_ranked_countries(ranking_index, ranked, order)
+
+
 def get_country_iso_codes():
     return {'Afghanistan': 'AFG',
  'Albania': 'ALB',